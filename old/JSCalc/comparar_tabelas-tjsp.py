@@ -1,7 +1,7 @@
-import json
-import re
 from datetime import datetime
 
+from tabela_js import objeto_js_para_dict
+
 # Carrega os dois arquivos
 with open("tabela_data2.js", "r", encoding="utf-8") as f:
     original_content = f.read()
@@ -13,29 +13,19 @@ with open("tabela_data2_atualizada.js", "r", encoding="utf-8") as f:
 def extrair_json(conteudo_js):
     inicio = conteudo_js.find("{")
     fim = conteudo_js.rfind("}") + 1
-    objeto_js = conteudo_js[inicio:fim]
-
-    # Corrige: troca aspas simples por aspas duplas
-    objeto_js = objeto_js.replace("'", '"')
-
-    # Corrige: garante que todas as chaves estejam entre aspas
-    objeto_js = re.sub(r'({|,)\s*([\d]{4}-[\d]{2})\s*:', r'\1 "\2":', objeto_js)
-
-    # Corrige: remove vírgula antes do fechamento
-    objeto_js = re.sub(r',\s*}', '}', objeto_js)
-
-    return json.loads(objeto_js)
+    return objeto_js_para_dict(conteudo_js[inicio:fim])
 
 # Converte os dois conteúdos
 original_dict = extrair_json(original_content)
 atualizado_dict = extrair_json(updated_content)
 
-# Detecta diferenças
-novas_chaves = sorted(set(atualizado_dict) - set(original_dict))
+# Detecta diferenças consultando os dicts direto (sem montar sets intermediários);
+# get(chave, antes) devolve o próprio valor antigo quando a chave sumiu -> não conta como alterada
+novas_chaves = sorted(chave for chave in atualizado_dict if chave not in original_dict)
 valores_alterados = [
-    (chave, original_dict[chave], atualizado_dict[chave])
-    for chave in original_dict
-    if chave in atualizado_dict and original_dict[chave] != atualizado_dict[chave]
+    (chave, antes, atualizado_dict[chave])
+    for chave, antes in original_dict.items()
+    if atualizado_dict.get(chave, antes) != antes
 ]
 
 # Resultado
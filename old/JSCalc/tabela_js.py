@@ -0,0 +1,23 @@
+# Conversão do objeto JS das tabelas TJSP ({ 'AAAA-MM': valor, ... }) para JSON.
+# Compartilhado por updatetjsp.py e comparar_tabelas-tjsp.py (sem dependência de pdfminer).
+
+import json
+import re
+
+APOS_TRANS = str.maketrans("'", '"')  # aspas simples -> duplas numa passada em C
+CHAVE_RE = re.compile(r'([{,])\s*(\d{4}-\d{2})\s*:')  # chave AAAA-MM sem aspas
+
+def sem_virgula_final(objeto_js):
+    # Objeto plano: a única vírgula antes de "}" possível é a final.
+    # Anda de trás para frente até o último caractere útil, sem regex sobre o texto todo.
+    i = len(objeto_js) - 2
+    while i >= 0 and objeto_js[i].isspace():
+        i -= 1
+    if i >= 0 and objeto_js[i] == ',':
+        return objeto_js[:i] + objeto_js[i + 1:]
+    return objeto_js
+
+def objeto_js_para_dict(objeto_js):
+    """Recebe o trecho '{ ... }' e devolve o dict correspondente."""
+    objeto_js = sem_virgula_final(objeto_js).translate(APOS_TRANS)
+    return json.loads(CHAVE_RE.sub(r'\1 "\2":', objeto_js))
@@ -31,34 +31,44 @@ CLI exemplos:
 
 from __future__ import annotations
 import argparse
+import base64
 import dataclasses
 import datetime as dt
+import gzip
 import json
+import math
+import mmap
 import os
 import re
 import shutil
 import sys
+import threading
 import time
-from typing import List, Tuple, Dict, Optional
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Tuple, Dict, Optional, TextIO
 
 try:
-    import urllib.request as urlreq
+    import http.client as httpc
     import urllib.parse as urlparse
+    import urllib.request as urlreq
 except Exception as e:
-    print("ERRO: Ambiente sem urllib.", e)
+    print("ERRO: Ambiente sem http.client/urllib.", e)
     sys.exit(1)
 
 # =========================
 # CONFIGURAÇÕES (EDITÁVEIS)
 # =========================
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)  # slots: leitura de atributo sem __dict__ (Python 3.10+)
 class Config:
     # ======== Geral ========
     DEBUG: bool = True
     WATCH_SECONDS: int = 0          # 0 = desliga watch
     ROOT_DIR: str = "."
     BACKUP_DIR: str = "./backups"
+    CACHE_DIR: str = "./cache"          # respostas SGS por (série, ano)
+    SGS_CACHE_TTL_SECONDS: int = 86400  # validade do cache dos anos ainda não fechados (baixados antes do fim da janela de revisão)
 
     # ======== Séries SGS ========
     SGS_BASE: str = "https://api.bcb.gov.br/dados/serie/bcdata.sgs.{serie}/dados"
@@ -67,6 +77,11 @@ class Config:
     SGS_SERIE_POUP_MENSAL: str = "196"    # Poupança (após 04/05/2012) - rentabilidade no período, % a.m.
     #SGS_SERIE_POUP_ANTIGA: str = "25"     # Poupança (regra antiga) - até 2012-05
     SGS_SERIE_POUP_ANTIGA: str = "7828"     # Poupança (regra antiga) - até 2012-05
+    SGS_MAX_WORKERS: int = 8              # downloads simultâneos (um por janela de datas)
+    HTTP_RETRIES: int = 3                 # novas tentativas em falha de rede / HTTP 5xx
+    HTTP_BACKOFF: float = 0.5             # espera base (s), dobra a cada tentativa
+    HTTP_MAX_REDIRECTS: int = 5           # 301/302/303/307/308 seguidos por requisição
+    HTTP_USER_AGENT: str = "Python-urllib/%d.%d" % sys.version_info[:2]  # mesmo UA padrão do urlopen
 
     # ======== Arquivos ========
     SELIC_JS_NAME: str = "selic_data.js"
@@ -115,6 +130,17 @@ def log(msg: str):
     if CONFIG.DEBUG:
         print(f"[DEBUG] {msg}")
 
+_log_debug = log
+
+def _log_off(msg: str):
+    pass
+
+def set_debug(enabled: bool):
+    # com DEBUG desligado, log vira no-op: nem o teste de CONFIG.DEBUG a cada chamada
+    global log
+    CONFIG.DEBUG = enabled
+    log = _log_debug if enabled else _log_off
+
 def err(code: str, extra: str = ""):
     base = CONFIG.ERROR_CODES.get(code, "Erro desconhecido.")
     if CONFIG.DEBUG:
@@ -137,49 +163,222 @@ def month_key(date_iso: str) -> str:
     # date_iso esperado "YYYY-MM-DD"
     return date_iso[:7]  # YYYY-MM
 
+def _fast_ddmmyyyy(s: str) -> Tuple[int, int, int]:
+    # "dd/mm/yyyy" -> (ano, mes, dia) por fatiamento (evita o strptime, lento e sensível a locale)
+    # isdigit() barra " 1", "+1" e "1_0", que int() aceitaria
+    dd, mm, yyyy = s[0:2], s[3:5], s[6:10]
+    if (len(s) != 10 or s[2] != "/" or s[5] != "/"
+            or not (dd.isdigit() and mm.isdigit() and yyyy.isdigit())):
+        raise ValueError(f"data fora do formato dd/mm/yyyy: {s!r}")
+    d, m = int(dd), int(mm)
+    if not (1 <= m <= 12 and 1 <= d <= 31):
+        raise ValueError(f"dia/mês fora do intervalo: {s!r}")
+    return (int(yyyy), m, d)
+
 # ===========================
 # DOWNLOAD SGS (chunk por ano)
 # ===========================
 
+# Uma conexão keep-alive por thread e host: as ~35 janelas anuais reaproveitam
+# o mesmo TCP + TLS em vez de um handshake completo por requisição.
+_HTTP_LOCAL = threading.local()
+
+def _http_proxy(scheme: str, host: str) -> Optional[urlparse.SplitResult]:
+    # mesmas regras do urlopen: HTTP(S)_PROXY / registro do Windows via getproxies(), respeitando NO_PROXY
+    proxy = urlreq.getproxies().get(scheme)
+    if not proxy or urlreq.proxy_bypass(host.split(":")[0]):
+        return None
+    return urlparse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+
+def _http_conn(scheme: str, host: str, timeout: int) -> Tuple[httpc.HTTPConnection, str, Dict[str, str]]:
+    """
+    Retorna (conexão, prefixo do path, headers extras) para scheme://host.
+    Com proxy: https usa túnel CONNECT (set_tunnel); http manda a URL absoluta ao proxy.
+    """
+    conns = getattr(_HTTP_LOCAL, "conns", None)
+    if conns is None:
+        conns = _HTTP_LOCAL.conns = {}
+    entry = conns.get((scheme, host))
+    if entry is None:
+        cls = httpc.HTTPSConnection if scheme == "https" else httpc.HTTPConnection
+        proxy = _http_proxy(scheme, host)
+        if proxy is None:
+            entry = (cls(host, timeout=timeout), "", {})
+        else:
+            auth: Dict[str, str] = {}
+            if proxy.username:
+                cred = f"{urlparse.unquote(proxy.username)}:{urlparse.unquote(proxy.password or '')}"
+                auth["Proxy-Authorization"] = "Basic " + base64.b64encode(cred.encode("utf-8")).decode("ascii")
+            proxy_host = proxy.netloc.rsplit("@", 1)[-1]
+            conn = cls(proxy_host, timeout=timeout)
+            if scheme == "https":
+                conn.set_tunnel(host, headers=auth)
+                entry = (conn, "", {})
+            else:
+                entry = (conn, f"http://{host}", auth)
+        conns[(scheme, host)] = entry
+    return entry
+
+def _http_drop(scheme: str, host: str):
+    entry = getattr(_HTTP_LOCAL, "conns", {}).pop((scheme, host), None)
+    if entry is not None:
+        entry[0].close()
+
+# Validadores HTTP (ETag / Last-Modified) por URL: url -> (etag, last_modified, corpo já parseado).
+# Numa nova chamada à mesma URL o GET vira condicional; 304 devolve o corpo guardado.
+_HTTP_VALIDATORS: Dict[str, Tuple[Optional[str], Optional[str], list]] = {}
+
+def http_get_json_cond(url: str, etag: Optional[str] = None, last_modified: Optional[str] = None,
+                       timeout: int = 30, _hops: int = 0) -> Tuple[int, Optional[list], Optional[str], Optional[str]]:
+    """
+    GET com If-None-Match / If-Modified-Since opcionais.
+    Segue redirecionamentos (até HTTP_MAX_REDIRECTS) e usa o proxy do ambiente como o urlopen.
+    Retorna (status, json, etag, last_modified): status 304 => json None (não mudou);
+    status 0 => falha de rede/parse (após as novas tentativas).
+    """
+    u = urlparse.urlsplit(url)
+    path = f"{u.path}?{u.query}" if u.query else (u.path or "/")
+    headers = {"Accept": "application/json", "Accept-Encoding": "gzip", "User-Agent": CONFIG.HTTP_USER_AGENT}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    for attempt in range(CONFIG.HTTP_RETRIES + 1):
+        if attempt:
+            time.sleep(CONFIG.HTTP_BACKOFF * (2 ** (attempt - 1)))
+        try:
+            log(f"GET {url}")
+            conn, prefix, extra = _http_conn(u.scheme, u.netloc, timeout)
+            conn.request("GET", prefix + path, headers={**headers, **extra})
+            resp = conn.getresponse()
+            data = resp.read()  # sempre ler o corpo inteiro para liberar a conexão
+        except (OSError, httpc.HTTPException) as e:
+            # conexão caiu/expirou (ex.: keep-alive fechado pelo servidor): reabre na próxima tentativa
+            _http_drop(u.scheme, u.netloc)
+            log(f"Falha de rede ({e}); tentativa {attempt + 1}/{CONFIG.HTTP_RETRIES + 1}")
+            continue
+        if resp.status >= 500:
+            continue
+        location = resp.getheader("Location")
+        if resp.status in (301, 302, 303, 307, 308) and location:
+            if _hops >= CONFIG.HTTP_MAX_REDIRECTS:
+                log(f"Redirecionamentos demais a partir de {url}")
+                return 0, None, None, None
+            target = urlparse.urljoin(url, location)
+            log(f"HTTP {resp.status} -> {target}")
+            return http_get_json_cond(target, etag, last_modified, timeout, _hops + 1)
+        new_etag = resp.getheader("ETag")
+        new_lm = resp.getheader("Last-Modified")
+        if resp.status == 304:
+            # só no 304 os validadores antigos continuam valendo (o corpo guardado não mudou)
+            log(f"304 Not Modified: {url}")
+            return 304, None, new_etag or etag, new_lm or last_modified
+        if resp.status != 200:
+            return resp.status, None, None, None
+        try:
+            if (resp.getheader("Content-Encoding") or "").lower() == "gzip":
+                data = gzip.decompress(data)
+            return 200, json.loads(data.decode("utf-8")), new_etag, new_lm
+        except Exception:
+            return 0, None, None, None
+    return 0, None, None, None
+
 def http_get_json(url: str, timeout: int = 30) -> Optional[list]:
+    cached = _HTTP_VALIDATORS.get(url)
+    etag, lm = (cached[0], cached[1]) if cached else (None, None)
+    status, js, etag, lm = http_get_json_cond(url, etag, lm, timeout)
+    if status == 304 and cached:
+        return cached[2]
+    if js is not None:
+        if etag or lm:
+            _HTTP_VALIDATORS[url] = (etag, lm, js)
+        else:
+            _HTTP_VALIDATORS.pop(url, None)  # corpo novo sem validadores: o par antigo não vale mais
+    return js
+
+def _dedup_sorted(all_items: List[dict]) -> List[dict]:
+    # dedup por data (último vence) chaveado pela tupla (ano, mes, dia):
+    # sorted() sobre as chaves inteiras já dá a ordem cronológica, sem reparsear datas
+    seen: Dict[Tuple[int, int, int], Tuple[str, object]] = {}
+    for it in all_items:
+        ds = it.get("data")
+        if not ds:
+            continue
+        try:
+            seen[_fast_ddmmyyyy(ds)] = (ds, it.get("valor"))
+        except ValueError:
+            log(f"Data inválida ignorada: {ds!r}")
+    return [{"data": ds, "valor": v} for _, (ds, v) in sorted(seen.items())]
+
+def _cached_year(serie: str, year: int, url: str) -> Optional[list]:
+    """
+    Cache em disco (CACHE_DIR/sgs_<serie>_<ano>.json) das respostas anuais da SGS.
+    Um ano só é fechado se o corpo foi baixado depois de 31/12 do ano seguinte (fim da janela
+    de revisão): esse cache vale para sempre. Os demais (inclusive um ano antigo baixado ainda
+    em curso) valem por SGS_CACHE_TTL_SECONDS;
+    vencido o prazo, o GET é condicional (ETag/Last-Modified guardados) e 304 reaproveita o corpo.
+    Formato: {"etag": ..., "last_modified": ..., "fetched_at": epoch, "body": [...]}.
+    """
+    path = os.path.join(CONFIG.CACHE_DIR, f"sgs_{serie}_{year}.json")
+    final_ts = dt.datetime(year + 1, 12, 31).timestamp()
+    entry: Optional[dict] = None
     try:
-        log(f"GET {url}")
-        with urlreq.urlopen(url, timeout=timeout) as resp:
-            if resp.status != 200:
-                raise RuntimeError(f"HTTP {resp.status}")
-            data = resp.read().decode("utf-8")
-            return json.loads(data)
-    except Exception as e:
-        return None
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if isinstance(entry, list):  # formato antigo: só o corpo
+                entry = {"body": entry, "fetched_at": os.path.getmtime(path)}
+            fetched_at = entry.get("fetched_at", 0)
+            if fetched_at >= final_ts or time.time() - fetched_at < CONFIG.SGS_CACHE_TTL_SECONDS:
+                log(f"CACHE {path}")
+                return entry["body"]
+    except Exception:
+        entry = None  # cache ilegível: baixa de novo
+    etag = entry.get("etag") if entry else None
+    lm = entry.get("last_modified") if entry else None
+    status, js, etag, lm = http_get_json_cond(url, etag, lm)
+    if status == 304 and entry:
+        js = entry["body"]
+    if entry and not (status in (200, 304) and isinstance(js, list)):
+        # rede fora, 4xx (ex.: 429/403) ou corpo inesperado: melhor o corpo vencido
+        # do que perder o ano (e falhar a não-regressão)
+        log(f"Falha ao revalidar {path} (HTTP {status}); usando cache vencido.")
+        return entry["body"]
+    if js is not None and isinstance(js, list):
+        try:
+            os.makedirs(CONFIG.CACHE_DIR, exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"etag": etag, "last_modified": lm, "fetched_at": time.time(), "body": js}, f)
+            os.replace(tmp, path)
+        except Exception as e:
+            log(f"Falha ao gravar cache {path}: {e}")
+    return js
 
 def fetch_sgs_series(serie: str, start_year: int = 1990, end_year: Optional[int] = None) -> List[dict]:
     if end_year is None:
         end_year = dt.date.today().year
     base = CONFIG.SGS_BASE.format(serie=serie)
+    years = list(range(start_year, end_year + 1))
+    urls = []
+    for year in years:
+        params = {"formato": "json", "dataInicial": f"01/01/{year}", "dataFinal": f"31/12/{year}"}
+        urls.append(f"{base}?{urlparse.urlencode(params)}")
+    # uma requisição por ano (ou cache), em paralelo (map preserva a ordem dos anos)
+    with ThreadPoolExecutor(max_workers=CONFIG.SGS_MAX_WORKERS) as ex:
+        results = list(ex.map(lambda yu: _cached_year(serie, *yu), zip(years, urls)))
     all_items: List[dict] = []
-    for year in range(start_year, end_year + 1):
-        ini = f"01/01/{year}"
-        fim = f"31/12/{year}"
-        params = {"formato": "json", "dataInicial": ini, "dataFinal": fim}
-        url = f"{base}?{urlparse.urlencode(params)}"
-        js = http_get_json(url)
+    for year, js in zip(years, results):
         if js is None or not isinstance(js, list):
             log(f"Falha ao obter ano {year} da série {serie}.")
             continue
         all_items.extend(js)
-    # dedup por data (último vence), ordenar
-    seen = {}
-    for it in all_items:
-        seen[it.get("data")] = it.get("valor")
-    out = [{"data": k, "valor": v} for k, v in seen.items() if k]
-    def to_date(s): return dt.datetime.strptime(s, CONFIG.DATE_IN_SGS).date()
-    out.sort(key=lambda d: to_date(d["data"]))
-    return out
+    return _dedup_sorted(all_items)
 def fetch_sgs_series_range(serie: str, start_date: str, end_date: str, step_years: int = 1) -> List[dict]:
     base = CONFIG.SGS_BASE.format(serie=serie)
     d0 = dt.datetime.strptime(start_date, "%d/%m/%Y").date()
     d1 = dt.datetime.strptime(end_date, "%d/%m/%Y").date()
-    all_items = []
+    urls = []
     y = d0.year
     while y <= d1.year:
         ini = dt.date(y, 1, 1)
@@ -187,55 +386,75 @@ def fetch_sgs_series_range(serie: str, start_date: str, end_date: str, step_year
         if ini < d0: ini = d0
         if fim > d1: fim = d1
         params = {"formato": "json", "dataInicial": ini.strftime("%d/%m/%Y"), "dataFinal": fim.strftime("%d/%m/%Y")}
-        url = f"{base}?{urlparse.urlencode(params)}"
-        #print (url)
-        js = http_get_json(url)
+        urls.append(f"{base}?{urlparse.urlencode(params)}")
+        y += step_years
+    with ThreadPoolExecutor(max_workers=CONFIG.SGS_MAX_WORKERS) as ex:
+        results = list(ex.map(http_get_json, urls))
+    all_items = []
+    for js in results:
         if js is not None and isinstance(js, list):
             all_items.extend(js)
-        y += step_years
-    seen = {}
-    for it in all_items:
-        if it.get("data"):
-            seen[it["data"]] = it.get("valor")
-    out = [{"data": k, "valor": v} for k, v in seen.items()]
-    def to_date(s): return dt.datetime.strptime(s, CONFIG.DATE_IN_SGS).date()
-    out.sort(key=lambda d: to_date(d["data"]))
+    return _dedup_sorted(all_items)
+_INV_DU_ANO = 1.0 / 252.0  # dias úteis por ano (base 252)
+
+def _monthly_factors(months_int: array, log_growth: array) -> List[Tuple[int, float]]:
+    """
+    Núcleo numérico da agregação diária -> mensal (sem strings nem dicts).
+    months_int[i] = ano*12 + (mes-1) do dia i; log_growth[i] = log(1 + fator diário do dia i).
+    Redução segmentada: cada trecho contíguo do mesmo mês vira expm1(fsum(fatia)),
+    ou seja prod(1 + fd) - 1 sem produto repetido nem cancelamento no "- 1".
+    Retorna [(months_int, fator_mensal), ...] em ordem crescente de mês.
+    """
+    n = len(log_growth)
+    if any(months_int[i] < months_int[i - 1] for i in range(1, n)):
+        # fetch_sgs_series já entrega ordenado; aqui só por garantia
+        order = sorted(range(n), key=months_int.__getitem__)
+        months_int = array("q", (months_int[i] for i in order))
+        log_growth = array("d", (log_growth[i] for i in order))
+    out: List[Tuple[int, float]] = []
+    start = 0
+    for i in range(1, n + 1):
+        if i == n or months_int[i] != months_int[start]:
+            out.append((months_int[start], math.expm1(math.fsum(log_growth[start:i]))))
+            start = i
     return out
+
 def fetch_selic1178_monthly_pairs(start_year: int = 1990) -> List[Tuple[str, float]]:
     """
     Busca a série 1178 (Selic anualizada base 252) diariamente e agrega em fator mensal.
     Passos:
       - Para cada dia útil do mês, converter % a.a. base 252 em fator diário: fd = (1 + r_aa) ** (1/252) - 1
       - Fator mensal: prod(1 + fd) - 1 sobre todos os dias úteis daquele mês.
+    Calculado em log: log(1 + fd) = log1p(r_aa) / 252 e fator mensal = expm1(soma do mês),
+    numericamente estável para taxas pequenas.
     Retorna [("YYYY-MM-01", fator_mensal_decimal), ...]
     """
     items = fetch_sgs_series(CONFIG.SGS_SERIE_SELIC_DIARIA_ANN252, start_year)
     if not items:
         return []
-    # Agrupar por YYYY-MM
-    from collections import defaultdict
-    buckets = defaultdict(list)
+    # Adaptador: strings -> dois vetores numéricos contíguos (mês, log(1 + fator diário))
+    months_int = array("q")
+    log_growth = array("d")
+    # globais/atributos usados por item amarrados em locais (sem LOAD_GLOBAL/LOAD_ATTR no laço)
+    parse, log1p, inv_du = _fast_ddmmyyyy, math.log1p, _INV_DU_ANO
+    add_month, add_lg = months_int.append, log_growth.append
     for it in items:
         raw_date = it.get("data"); raw_val = it.get("valor")
         if not raw_date or raw_val in (None, ""):
             continue
         try:
-            d = dt.datetime.strptime(raw_date, CONFIG.DATE_IN_SGS).date()
-            key = f"{d.year:04d}-{d.month:02d}"
+            y, m, _ = parse(raw_date)
             r_aa = float(str(raw_val).replace(",", ".").strip()) / 100.0  # % a.a. -> decimal a.a.
-            # fator diário correspondente (base 252)
-            fd = (1.0 + r_aa) ** (1.0/252.0) - 1.0
+            # log(1 + fd) do fator diário correspondente (base 252)
+            lg = log1p(r_aa) * inv_du
         except Exception:
             continue
-        buckets[key].append(fd)
+        add_month(y * 12 + (m - 1))
+        add_lg(lg)
     pairs: List[Tuple[str, float]] = []
-    for key in sorted(buckets.keys()):
-        acc = 1.0
-        for fd in buckets[key]:
-            acc *= (1.0 + fd)
-        fm = acc - 1.0
-        date_iso = f"{key}-01"
-        pairs.append((date_iso, fm))
+    for mi, fm in _monthly_factors(months_int, log_growth):
+        y, m0 = divmod(mi, 12)
+        pairs.append((f"{y:04d}-{m0 + 1:02d}-01", fm))
     return pairs
 
 
@@ -248,18 +467,44 @@ PAIR_RE = re.compile(
     r"""\{\s*date\s*:\s*['"](\d{4}-\d{2}-\d{2})['"]\s*,\s*factor\s*:\s*([0-9.]+)\s*\}""",
     re.MULTILINE
 )
+# mesma regra em bytes: varre o arquivo mapeado em memória sem decodificar/copiar o conteúdo
+PAIR_RE_BYTES = re.compile(
+    rb"""\{\s*date\s*:\s*['"](\d{4}-\d{2}-\d{2})['"]\s*,\s*factor\s*:\s*([0-9.]+)\s*\}""",
+    re.MULTILINE
+)
 
 def read_js_pairs(path: str) -> List[Tuple[str, float]]:
-    if not os.path.exists(path):
-        return []
-    with open(path, "r", encoding="utf-8", errors="ignore") as f:
-        content = f.read()
-    out = [(m.group(1), float(m.group(2))) for m in PAIR_RE.finditer(content)]
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return []  # mmap não aceita arquivo vazio
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        out = [(m.group(1).decode("ascii"), float(m.group(2))) for m in PAIR_RE_BYTES.finditer(mm)]
     return sorted(out, key=lambda x: x[0])
 
-def serialize_js(const_name: str, pairs: List[Tuple[str, float]]) -> str:
-    lines = [f"  {{ date: '{d}', factor: {v:.{CONFIG.DECIMALS_JS}f} }}," for d, v in pairs]
-    return f"const {const_name} = [\n" + "\n".join(lines) + "\n];\n"
+_JS_ROWS_PER_WRITE = 1024
+
+def serialize_js_to(fp: TextIO, const_name: str, pairs: List[Tuple[str, float]]) -> None:
+    # grava direto no arquivo em blocos: cada bloco de linhas sai de UMA operação "%"
+    # (template repetido x tupla achatada), em vez de uma f-string por valor
+    row = "  { date: '%s', factor: %." + str(CONFIG.DECIMALS_JS) + "f },\n"
+    fp.write(f"const {const_name} = [\n")
+    for i in range(0, len(pairs), _JS_ROWS_PER_WRITE):
+        chunk = pairs[i:i + _JS_ROWS_PER_WRITE]
+        fp.write((row * len(chunk)) % tuple(x for p in chunk for x in p))
+    fp.write("];\n")
+
+def _link_or_copy(src: str, dest: str):
+    """
+    Hard link (O(1), zero bytes copiados) quando src/dest estão no mesmo filesystem.
+    Seguro porque os .js só são regravados via write_atomic (os.replace cria um inode novo),
+    então o link nunca enxerga a versão nova. Sem suporte a link (EXDEV, FAT, ...):
+    cópia com buffer de 1 MiB + metadados (equivalente ao copy2).
+    """
+    try:
+        os.link(src, dest)
+    except OSError:
+        with open(src, "rb") as s, open(dest, "wb") as d:
+            shutil.copyfileobj(s, d, length=1 << 20)
+        shutil.copystat(src, dest)
 
 def backup_file(path: str) -> Optional[str]:
     try:
@@ -269,21 +514,37 @@ def backup_file(path: str) -> Optional[str]:
         stamp = now_stamp()
         base = os.path.basename(path)
         dest = os.path.join(CONFIG.BACKUP_DIR, f"{base}.{stamp}.bak")
-        shutil.copy2(path, dest)
+        _link_or_copy(path, dest)
         log(f"Backup criado: {dest}")
         return dest
     except Exception as e:
         return None
 
+def _lost_sorted(old_keys: List[str], new_keys: List[str]) -> List[str]:
+    """
+    Chaves de old_keys ausentes em new_keys, numa única passada (two-pointer).
+    Ambas as listas devem estar ordenadas; repetições são toleradas e
+    o resultado sai ordenado e sem duplicatas.
+    """
+    lost: List[str] = []
+    j, n = 0, len(new_keys)
+    for k in old_keys:
+        while j < n and new_keys[j] < k:
+            j += 1
+        if (j == n or new_keys[j] != k) and (not lost or lost[-1] != k):
+            lost.append(k)
+    return lost
+
 def non_regression(old: List[Tuple[str, float]], new: List[Tuple[str, float]], code_on_fail: str, mode: str) -> bool:
+    # old/new chegam ordenados por data (read_js_pairs, to_pairs, 1178), logo as chaves também
     if mode == "month":
         # comparar por YYYY-MM
-        old_keys = {month_key(d) for d, _ in old}
-        new_keys = {month_key(d) for d, _ in new}
+        old_keys = [month_key(d) for d, _ in old]
+        new_keys = [month_key(d) for d, _ in new]
     else:  # strict
-        old_keys = {d for d, _ in old}
-        new_keys = {d for d, _ in new}
-    lost = sorted(list(old_keys - new_keys))
+        old_keys = [d for d, _ in old]
+        new_keys = [d for d, _ in new]
+    lost = _lost_sorted(old_keys, new_keys)
     #print ("Old:")
     #print (sorted(list(old_keys)))
     #print ("\n")
@@ -312,20 +573,48 @@ def non_regression(old: List[Tuple[str, float]], new: List[Tuple[str, float]], c
             return False
     return True
 
-def write_atomic(path: str, content: str, code_fail: str) -> bool:
+def _fsync_dir(dirpath: str):
+    # torna o rename durável em caso de queda (POSIX); no Windows não há fsync de diretório.
+    # Melhor esforço: o arquivo já foi trocado, então falha aqui (FUSE, rede, permissão) só é logada.
+    if os.name != "posix":
+        return
     try:
-        tmp = f"{path}.tmp"
-        with open(tmp, "w", encoding="utf-8") as f:
-            f.write(content)
+        fd = os.open(dirpath, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        log(f"fsync do diretório {dirpath} falhou (ignorado): {e}")
+
+def write_atomic(path: str, writer: Callable[[TextIO], None], code_fail: str) -> bool:
+    tmp = f"{path}.tmp"
+    try:
+        # buffer de 1 MiB: poucas chamadas write(2) mesmo com a serialização em streaming
+        with open(tmp, "w", encoding="utf-8", buffering=1 << 20) as f:
+            writer(f)
+            f.flush()
+            os.fsync(f.fileno())
         os.replace(tmp, path)
-        return True
     except Exception as e:
         err(code_fail, extra=str(e))
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
         return False
+    # fora do try: depois do os.replace o novo conteúdo já está no lugar e não deve ser revertido
+    _fsync_dir(os.path.dirname(os.path.abspath(path)))
+    return True
 
 def restore_backup(latest_backup_path: str, target_path: str, code_fail: str) -> bool:
     try:
-        shutil.copy2(latest_backup_path, target_path)
+        # link/cópia para .tmp + os.replace: o alvo nunca fica pela metade
+        tmp = f"{target_path}.tmp"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        _link_or_copy(latest_backup_path, tmp)
+        os.replace(tmp, target_path)
         log(f"Restaurado: {target_path} <- {latest_backup_path}")
         return True
     except Exception as e:
@@ -354,8 +643,9 @@ def merge_poup_series(items_old: List[dict], items_new: List[dict]) -> List[dict
     - Até 2012-04 (inclusive) => série 7828
     - De 2012-05 em diante     => série 196
     """
-    def parse_date(s): return dt.datetime.strptime(s, CONFIG.DATE_IN_SGS).date()
-    def month_key_iso(d): return f"{d.year:04d}-{d.month:02d}"  # YYYY-MM
+    def month_key_iso(s):  # dd/mm/yyyy -> YYYY-MM (ValueError em data malformada, como o strptime)
+        y, m, _ = _fast_ddmmyyyy(s)
+        return f"{y:04d}-{m:02d}"
 
     cutoff_month = "2012-06"  # mês de corte
 
@@ -363,15 +653,13 @@ def merge_poup_series(items_old: List[dict], items_new: List[dict]) -> List[dict
 
     # antiga: mantém meses < 2012-05
     for it in items_old:
-        d = parse_date(it["data"])
-        mk = month_key_iso(d)
+        mk = month_key_iso(it["data"])
         if mk < cutoff_month:
             merged_months[mk] = it.get("valor")
 
     # nova: mantém meses >= 2012-05 (prevalece sobre eventual duplicata)
     for it in items_new:
-        d = parse_date(it["data"])
-        mk = month_key_iso(d)
+        mk = month_key_iso(it["data"])
         if mk >= cutoff_month:
             merged_months[mk] = it.get("valor")
 
@@ -391,14 +679,15 @@ def to_pairs(items: List[dict]) -> List[Tuple[str, float]]:
     Converte [{"data":"dd/mm/yyyy", "valor":"x,yy"}] -> [("yyyy-mm-01", 0.xxyy)]
     """
     out: List[Tuple[str, float]] = []
+    parse = _fast_ddmmyyyy
     for it in items:
         raw_date = it.get("data")
         raw_val = it.get("valor")
         if not raw_date or raw_val in (None, ""):
             continue
         try:
-            d = dt.datetime.strptime(raw_date, CONFIG.DATE_IN_SGS).date()
-            d_iso = d.strftime(CONFIG.OUT_DATE_ISO)
+            y, m, _ = parse(raw_date)
+            d_iso = f"{y:04d}-{m:02d}-01"
             v = float(str(raw_val).replace(",", ".").strip()) / 100.0
         except Exception:
             continue
@@ -430,12 +719,9 @@ def update_selic(start_year: int, nr_mode: str, source: str = "1178") -> int:
     if pairs_old and not non_regression(pairs_old, pairs_new, "0xF000104", nr_mode):
         if bak: log("Não-regressão falhou (SELIC). Mantendo antigo.")
         return 3
-    try:
-        js = serialize_js(CONFIG.SELIC_JS_CONST_NAME, pairs_new)
-    except Exception as e:
-        err("0xF000103", extra=str(e))
-        return 4
-    if not write_atomic(target, js, "0xF000105"):
+    # serialização acontece durante a escrita: falha aqui cai em 0xF000105 + restauração
+    writer = lambda f: serialize_js_to(f, CONFIG.SELIC_JS_CONST_NAME, pairs_new)
+    if not write_atomic(target, writer, "0xF000105"):
         if bak: restore_backup(bak, target, "0xF000106")
         return 5
     log(f"SELIC atualizada: {target} ({len(pairs_new)} registros)")
@@ -465,12 +751,8 @@ def update_poupanca(start_year: int, nr_mode: str) -> int:
     if pairs_old and not non_regression(pairs_old, pairs_new, "0xF000204", nr_mode):
         if bak: log("Não-regressão falhou (Poupança). Mantendo antigo.")
         return 3
-    try:
-        js = serialize_js(CONFIG.POUP_JS_CONST_NAME, pairs_new)
-    except Exception as e:
-        err("0xF000203", extra=str(e))
-        return 4
-    if not write_atomic(target, js, "0xF000205"):
+    writer = lambda f: serialize_js_to(f, CONFIG.POUP_JS_CONST_NAME, pairs_new)
+    if not write_atomic(target, writer, "0xF000205"):
         if bak: restore_backup(bak, target, "0xF000206")
         return 5
     log(f"Poupança atualizada: {target} ({len(pairs_new)} registros)")
@@ -480,15 +762,24 @@ def update_poupanca(start_year: int, nr_mode: str) -> int:
 # VERIFY / RESTORE / WATCH
 # ===========================
 
+def list_backups(target_name: str) -> List[str]:
+    """
+    Backups de target_name em BACKUP_DIR, do mais novo ao mais antigo.
+    Ordena pelo carimbo no nome (ARQ.YYYY-MM-DD_HHMMSS.bak), não por st_mtime:
+    backups feitos por hard link herdam o mtime do arquivo original.
+    """
+    with os.scandir(CONFIG.BACKUP_DIR) as it:
+        names = [e.name for e in it if e.name.startswith(target_name) and e.is_file()]
+    names.sort(reverse=True)
+    return [os.path.join(CONFIG.BACKUP_DIR, x) for x in names]
+
 def verify(target_name: str, nr_mode: str) -> int:
     target = join_root(target_name)
     current = read_js_pairs(target)
     if not os.path.isdir(CONFIG.BACKUP_DIR):
         print("Sem backups para verificar.")
         return 0
-    backups = sorted([os.path.join(CONFIG.BACKUP_DIR, x)
-                      for x in os.listdir(CONFIG.BACKUP_DIR)
-                      if x.startswith(target_name)], reverse=True)
+    backups = list_backups(target_name)
     if not backups:
         print("Sem backups para verificar.")
         return 0
@@ -503,9 +794,7 @@ def restore_last(target_name: str) -> int:
     if not os.path.isdir(CONFIG.BACKUP_DIR):
         print("Sem backups.")
         return 1
-    backups = sorted([os.path.join(CONFIG.BACKUP_DIR, x)
-                      for x in os.listdir(CONFIG.BACKUP_DIR)
-                      if x.startswith(target_name)], reverse=True)
+    backups = list_backups(target_name)
     if not backups:
         print("Sem backups.")
         return 1
@@ -551,7 +840,7 @@ def parse_cli():
 def main():
     args = parse_cli()
     CONFIG.ROOT_DIR = args.root
-    CONFIG.DEBUG = (str(args.debug).lower() in ("1", "true", "t", "on", "yes", "y"))
+    set_debug(str(args.debug).lower() in ("1", "true", "t", "on", "yes", "y"))
     CONFIG.WATCH_SECONDS = int(args.watch)
 
     if args.cmd == "selic":
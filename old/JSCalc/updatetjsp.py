@@ -3,7 +3,14 @@
 import re
 import json
 from pathlib import Path
-from pdfminer.high_level import extract_text
+
+from tabela_js import objeto_js_para_dict
+
+try:
+    import pdftotext  # binding do poppler (C): bem mais rápido que o pdfminer em tabelas numéricas
+except ImportError:
+    pdftotext = None
+    from pdfminer.high_level import extract_text
 
 MESES = {
     'JAN': '01', 'FEV': '02', 'MAR': '03', 'ABR': '04',
@@ -11,50 +18,49 @@ MESES = {
     'SET': '09', 'OUT': '10', 'NOV': '11', 'DEZ': '12'
 }
 
+# Cada match é uma linha do PDF: ou linha de mês (grupos 1-2) ou cabeçalho de anos (grupo 3)
+LINHA_RE = re.compile(
+    r'^[^\S\n]*(?:(JAN|FEV|MAR|ABR|MAI|JUN|JUL|AGO|SET|OUT|NOV|DEZ)(?!\S)(.*)'
+    r'|((?:1|2)\d{3}(?:[^\S\n]+\d{4}){2,}.*))$',
+    re.M
+)
+ANO_RE = re.compile(r'\d{4}')
+
+TABELA_RE = re.compile(r'const tabelaTJSP\s*=\s*(\{[\s\S]+?\})\s*;')
+
 def carregar_tabela_existente(path_js):
     with open(path_js, encoding='utf-8') as f:
         conteudo = f.read()
-        match = re.search(r'const tabelaTJSP\s*=\s*(\{[\s\S]+?\})\s*;', conteudo)
+        match = TABELA_RE.search(conteudo)
         if not match:
             raise ValueError("Bloco 'const tabelaTJSP = { ... };' não encontrado.")
 
-        objeto_js = match.group(1)
-
-        # Passo 1: Trocar aspas simples por aspas duplas
-        objeto_js = objeto_js.replace("'", '"')
-
-        # Passo 2: Garantir que todas as chaves estejam entre aspas duplas
-        objeto_json = re.sub(r'(\{|,)(\s*)([\d]{4}-[\d]{2})(\s*):', r'\1 "\3" :', objeto_js)
-
-        # Passo 3: Remover vírgulas finais antes de chave de fechamento (caso exista)
-        objeto_json = re.sub(r',\s*}', '}', objeto_json)
+        return objeto_js_para_dict(match.group(1))
 
-        return json.loads(objeto_json)
+def extrair_texto_pdf(path_pdf):
+    if pdftotext is None:
+        return extract_text(path_pdf)
+    # physical=True preserva o layout: cada linha da tabela (mês + valores) fica numa linha só
+    with open(path_pdf, 'rb') as f:
+        return "\n".join(pdftotext.PDF(f, physical=True))
 
 def extrair_dados_pdf(path_pdf):
-    texto = extract_text(path_pdf)
-    linhas = texto.splitlines()
+    texto = extrair_texto_pdf(path_pdf)
     anos = []
     tabela = {}
 
-    for linha in linhas:
-        linha = linha.strip()
-        if re.match(r'^(JAN|FEV|MAR|ABR|MAI|JUN|JUL|AGO|SET|OUT|NOV|DEZ)', linha):
-            tokens = re.split(r'\s+', linha)
-            mes = tokens[0]
-            for i, valor_str in enumerate(tokens[1:]):
-                if i >= len(anos):
-                    continue
-                ano = anos[i]
-                valor_str = valor_str.replace('.', '').replace(',', '.')
-                try:
-                    valor = float(valor_str)
-                    chave = f"{ano}-{MESES[mes]}"
-                    tabela[chave] = valor
-                except ValueError:
-                    continue
-        elif re.match(r'^(1|2)\d{3}(\s+(\d{4})){2,}', linha):
-            anos = re.findall(r'(\d{4})', linha)
+    # Uma única passada sobre o texto inteiro (sem splitlines/re.match/re.split por linha)
+    for m in LINHA_RE.finditer(texto):
+        mes, resto, linha_anos = m.groups()
+        if linha_anos:
+            anos = ANO_RE.findall(linha_anos)
+            continue
+        for ano, valor_str in zip(anos, resto.split()):
+            try:
+                valor = float(valor_str.replace('.', '').replace(',', '.'))
+            except ValueError:
+                continue
+            tabela[f"{ano}-{MESES[mes]}"] = valor
 
     return tabela
 
@@ -1,28 +1,129 @@
+import errno
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# copy_file_range/sendfile indisponíveis para este par de arquivos -> tenta o próximo método
+_ERRNOS_SEM_ZERO_COPY = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP)
+_COPY_BUFSIZE = 1 << 20  # 1 MiB por read/write na cópia em espaço de usuário
+
+def _copia_kernel(src_fd: int, dst_fd: int, tamanho: int) -> None:
+    # copy_file_range (reflink/CoW em btrfs/XFS) e, se não der, sendfile:
+    # os bytes vão de fd para fd dentro do kernel, sem passar por buffer em Python
+    restante = tamanho
+    if hasattr(os, "copy_file_range"):
+        try:
+            while restante > 0:
+                n = os.copy_file_range(src_fd, dst_fd, restante)
+                if n == 0:
+                    # procfs/sysfs, alguns FUSE/CIFS e cross-FS devolvem 0 sem copiar: tenta sendfile
+                    break
+                restante -= n
+        except OSError as e:
+            if e.errno not in _ERRNOS_SEM_ZERO_COPY:
+                raise
+    # offset None: continua da posição atual (inclusive após copy_file_range parcial)
+    while restante > 0:
+        n = os.sendfile(dst_fd, src_fd, None, restante)
+        if n == 0:
+            break
+        restante -= n
+    if restante > 0:
+        # nunca aceitar backup truncado: _copiar_backup cai na cópia com buffer
+        raise OSError(errno.EIO, f"cópia zero-copy incompleta ({tamanho - restante}/{tamanho} bytes)")
+
+def _copia_com_buffer(src: str, dst: str) -> None:
+    # um único bytearray de 1 MiB reaproveitado (readinto): poucas syscalls, sem alocar por bloco
+    buf = bytearray(_COPY_BUFSIZE)
+    view = memoryview(buf)
+    # destino bufferizado: BufferedWriter repassa o bloco de 1 MiB direto e garante escrita completa
+    with open(src, "rb", buffering=0) as fsrc, open(dst, "wb") as fdst:
+        while True:
+            n = fsrc.readinto(buf)
+            if not n:
+                break
+            fdst.write(view[:n])
+
+def _copiar_backup(src: str, dst: str) -> None:
+    """Equivalente ao shutil.copy2, mas zero-copy quando o SO permite."""
+    try:
+        with open(src, "rb", buffering=0) as fsrc, open(dst, "wb", buffering=0) as fdst:
+            _copia_kernel(fsrc.fileno(), fdst.fileno(), os.fstat(fsrc.fileno()).st_size)
+    except (OSError, AttributeError):
+        # sem copy_file_range/sendfile utilizáveis (ex.: Windows): cópia com buffer de 1 MiB
+        _copia_com_buffer(src, dst)
+    shutil.copystat(src, dst)
+
+def _backup_por_link(src: str, dst: str) -> None:
+    # hard link: um link(2), custo constante; seguro porque o original só é trocado via os.replace
+    # (inode novo), então o backup continua apontando para o conteúdo antigo
+    try:
+        os.link(src, dst)
+    except OSError:
+        _copiar_backup(src, dst)  # outro filesystem / sem suporte a hard link
+
+def _fsync_arquivo(path: str) -> None:
+    # O_RDWR: no Windows o fsync (_commit/FlushFileBuffers) exige handle com escrita
+    fd = os.open(path, os.O_RDWR)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _fsync_diretorio(path: str) -> None:
+    # Torna o os.replace durável (POSIX). Melhor esforço: o JS novo já está no lugar,
+    # então falha aqui (FUSE, rede) não deve virar erro. Windows não tem fsync de diretório.
+    if os.name != "posix":
+        return
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        print(f"[AVISO] fsync do diretório de {path} falhou (ignorado): {e}")
+
+_backup_dir_ready = False  # mkdir do BACKUP_DIR só na primeira chamada do processo
+
+def _garantir_backup_dir() -> None:
+    global _backup_dir_ready
+    if not _backup_dir_ready:
+        Path(CONFIG.BACKUP_DIR).mkdir(parents=True, exist_ok=True)
+        _backup_dir_ready = True
+
 def update_tjsp_via_pdf() -> int:
     print("\n[INFO] Atualizando TJSP via PDF oficial...")
     
-    # 1. Baixar o PDF
-    if not baixar_pdf_tjsp(CONFIG.TJSP_URL, CONFIG.TJSP_LOCAL_PDF):
-        print("[ERRO] Falha ao baixar PDF do TJSP.")
-        return 1
-
-    # 2. Extrair dados do PDF
-    nova = extrair_dados_pdf_tjsp(CONFIG.TJSP_LOCAL_PDF)
-    if not nova:
-        print("[ERRO] Nenhum dado extraído do PDF.")
-        return 2
-
-    # 3. Verificar se o arquivo JS original existe
+    # 3. Verificar se o arquivo JS original existe (antes de disparar download/leitura)
     if not Path(CONFIG.TJSP_JS_NAME).exists():
         print(f"[ERRO] Arquivo {CONFIG.TJSP_JS_NAME} não encontrado.")
         return 3
 
-    # 4. Carregar tabela existente
-    try:
-        antiga = carregar_tabela_tjsp_existente(CONFIG.TJSP_JS_NAME)
-    except Exception as e:
-        print(f"[ERRO] Falha ao carregar JS existente: {e}")
-        return 4
+    # 1 + 4. Baixar o PDF e carregar a tabela existente em paralelo
+    #        (rede e disco/parse são independentes: a leitura fica escondida atrás do download)
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        fut_pdf = ex.submit(baixar_pdf_tjsp, CONFIG.TJSP_URL, CONFIG.TJSP_LOCAL_PDF)
+        fut_antiga = ex.submit(carregar_tabela_tjsp_existente, CONFIG.TJSP_JS_NAME)
+
+        # 1. Download
+        if not fut_pdf.result():
+            print("[ERRO] Falha ao baixar PDF do TJSP.")
+            return 1
+
+        # 2. Extrair dados do PDF (enquanto a tabela existente ainda pode estar carregando)
+        nova = extrair_dados_pdf_tjsp(CONFIG.TJSP_LOCAL_PDF)
+        if not nova:
+            print("[ERRO] Nenhum dado extraído do PDF.")
+            return 2
+
+        # 4. Tabela existente
+        try:
+            antiga = fut_antiga.result()
+        except Exception as e:
+            print(f"[ERRO] Falha ao carregar JS existente: {e}")
+            return 4
 
     # 5. Comparar
     unificada, novos, perdidos = comparar_e_atualizar_tjsp(antiga, nova)
@@ -35,14 +136,23 @@ def update_tjsp_via_pdf() -> int:
         print("[INFO] Nenhuma entrada nova encontrada. Nada a fazer.")
         return 0
 
-    # 6. Backup + salvar atualizado
+    # 6. Backup + salvar atualizado: grava em .new + fsync, backup por hard link
+    #    e só então troca atomicamente (queda no meio nunca deixa o JS pela metade)
+    novo = f"{CONFIG.TJSP_JS_NAME}.new"
     try:
-        stamp = dt.datetime.now().strftime("%Y-%m-%d_%H%M%S")
-        Path(CONFIG.BACKUP_DIR).mkdir(exist_ok=True)
-        shutil.copy2(CONFIG.TJSP_JS_NAME, f"{CONFIG.BACKUP_DIR}/{CONFIG.TJSP_JS_NAME}.{stamp}.bak")
-        salvar_tabela_tjsp_em_js(unificada, CONFIG.TJSP_JS_NAME)
+        stamp = time.strftime("%Y-%m-%d_%H%M%S", time.localtime())
+        _garantir_backup_dir()
+        salvar_tabela_tjsp_em_js(unificada, novo)
+        _fsync_arquivo(novo)
+        _backup_por_link(CONFIG.TJSP_JS_NAME, f"{CONFIG.BACKUP_DIR}/{CONFIG.TJSP_JS_NAME}.{stamp}.bak")
+        os.replace(novo, CONFIG.TJSP_JS_NAME)
+        _fsync_diretorio(CONFIG.TJSP_JS_NAME)
         print(f"[OK] {len(novos)} entradas novas adicionadas. Arquivo atualizado com sucesso!")
         return 0
     except Exception as e:
+        try:
+            os.remove(novo)
+        except OSError:
+            pass
         print(f"[ERRO] Falha ao salvar arquivo atualizado: {e}")
         return 6